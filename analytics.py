@@ -0,0 +1,407 @@
+"""
+Archiving and columnar analysis of played games.
+
+HistoryWriter is a SemiosphereEnv recorder that appends one fixed-size record per action to an archive file. The
+records of a game are only written once it is over, with the final result of each seat filled in, so an archive
+never holds unfinished games.
+
+ArchiveReader streams an archive back in fixed-size chunks, each split into one contiguous numpy array per column,
+and never holds more than a chunk (plus the end of the one game that straddles it) in memory. ArchiveStats
+aggregates those chunks with vectorized numpy operations: mark placements per cell, how long players survive
+against the void, and how often players win after dropping their planet compared to carrying it throughout.
+
+Usage: python3 analytics.py record <archive path> <number of games> [number of players] | summarize <archive path>
+"""
+import os
+import random
+import struct
+import sys
+
+import numpy as np
+
+from environment import SemiosphereEnv, NUM_FIXED_ACTIONS, DROP_PLANET, ENTER_SEMIOSPHERE
+
+
+MAGIC = b"SMHA"
+VERSION = 2
+# Magic, version, grid rows and grid columns.
+HEADER = struct.Struct("<4sHHH")
+
+# Action types. The fixed actions keep their SemiosphereEnv action ids.
+LEAVE_SEMIOSPHERE = NUM_FIXED_ACTIONS
+PLACE_MARK = NUM_FIXED_ACTIONS + 1
+ERASE_MARK = NUM_FIXED_ACTIONS + 2
+ACTION_TYPE_NAMES = (
+    "Move Forward",
+    "Move Left",
+    "Move Right",
+    "Move Backwards",
+    "Drop my Planet",
+    "Enter Semiosphere",
+    "Leave Semiosphere",
+    "Place a Mark",
+    "Erase a Mark",
+)
+
+# One record per action:
+#   game            Number of the game within the archive, counting from 0
+#   players         Number of players in the game
+#   seat            Seat of the player who acted
+#   action_type     One of the action types above
+#   cell            row * columns + column of the cell the action ended on or targeted, -1 for entering the Semiosphere
+#   moves_before    The player's moves_left before the action
+#   moves_after     The player's moves_left after the action
+#   void_row        Game.current_void_row when the action was taken
+#   results         Final result of the game for every seat, two bits per seat starting from the lowest bits: 2 for a
+#                   win, 1 for a tie and 0 for a loss
+RECORD = np.dtype([
+    ("game", "<u4"),
+    ("players", "u1"),
+    ("seat", "u1"),
+    ("action_type", "u1"),
+    ("cell", "<i2"),
+    ("moves_before", "<i2"),
+    ("moves_after", "<i2"),
+    ("void_row", "u1"),
+    ("results", "u1"),
+])
+# Columns produced by ArchiveReader: the stored ones, plus
+#   round           Number of rounds completed before the action. The void takes one row per round, so this is
+#                   void_row, and isn't stored separately.
+#   outcome         Final result of the game for the seat that acted: 1 for a win, 0 for a tie and -1 for a loss
+COLUMNS = RECORD.names + ("round", "outcome")
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _read_header(archive_file):
+    data = archive_file.read(HEADER.size)
+    if len(data) != HEADER.size:
+        raise ArchiveError("File is too short to be a game archive.")
+    magic, version, grid_rows, grid_columns = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise ArchiveError("File is not a version {} game archive.".format(VERSION))
+    return grid_rows, grid_columns
+
+
+class HistoryWriter:
+    """
+    Records the games played in a SemiosphereEnv to an archive file. Pass it to SemiosphereEnv as its recorder, and
+    close it (or use it as a context manager) once done. Writing to an existing archive appends to it, as long as it
+    was recorded on a grid of the same size.
+    """
+
+    def __init__(self, path, grid_rows, grid_columns, buffer_size=1 << 16):
+        """
+        :param buffer_size: Number of records kept in memory before they are written out.
+        """
+        self.grid_rows = grid_rows
+        self.grid_columns = grid_columns
+        self.games_written = 0
+        self._next_game = 0
+        self._game_rows = []
+        self._buffer = np.empty(buffer_size, dtype=RECORD)
+        self._buffered = 0
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "rb") as archive_file:
+                if _read_header(archive_file) != (grid_rows, grid_columns):
+                    raise ArchiveError("Archive {} was recorded on a different grid size.".format(path))
+                archive_file.seek(0, os.SEEK_END)
+                size = archive_file.tell() - HEADER.size
+                if size % RECORD.itemsize:
+                    raise ArchiveError("Archive {} ends with a partial record.".format(path))
+                if size:
+                    archive_file.seek(-RECORD.itemsize, os.SEEK_END)
+                    last = np.frombuffer(archive_file.read(RECORD.itemsize), dtype=RECORD)
+                    self._next_game = int(last["game"][0]) + 1
+            self._file = open(path, "ab")
+        else:
+            self._file = open(path, "wb")
+            self._file.write(HEADER.pack(MAGIC, VERSION, grid_rows, grid_columns))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start_game(self, env):
+        if (env.grid_rows, env.grid_columns) != (self.grid_rows, self.grid_columns):
+            raise ArchiveError("The environment's grid doesn't match the archive's.")
+        # Drop whatever was recorded of a game that was reset before it finished.
+        self._game_rows = []
+
+    def record(self, env, seat, action, moves_before, moves_after, void_row):
+        """
+        Record an action that has just been applied by the given seat.
+        """
+        if action < NUM_FIXED_ACTIONS:
+            action_type = action
+            if action == ENTER_SEMIOSPHERE:
+                cell = -1
+            elif action == DROP_PLANET:
+                cell = env.players[seat].planet.current_cell
+                cell = cell.row * self.grid_columns + cell.column
+            else:
+                cell = env.players[seat].current_cell
+                cell = cell.row * self.grid_columns + cell.column
+        elif action < env.mark_offset:
+            action_type = LEAVE_SEMIOSPHERE
+            cell = (self.grid_rows - 1) * self.grid_columns + action - env.leave_offset
+        elif action < env.erase_offset:
+            action_type = PLACE_MARK
+            cell = action - env.mark_offset
+        else:
+            action_type = ERASE_MARK
+            cell = action - env.erase_offset
+        self._game_rows.append(
+            (self._next_game, env.num_players, seat, action_type, cell, moves_before, moves_after, void_row, 0)
+        )
+
+    def end_game(self, env):
+        """
+        Fill in the final result of every seat and queue the finished game for writing.
+        """
+        records = np.array(self._game_rows, dtype=RECORD)
+        self._game_rows = []
+        records["results"] = sum((int(reward) + 1) << (2 * seat) for seat, reward in enumerate(env.rewards))
+        self._next_game += 1
+        self.games_written += 1
+
+        start = 0
+        while start < len(records):
+            count = min(len(records) - start, len(self._buffer) - self._buffered)
+            self._buffer[self._buffered:self._buffered + count] = records[start:start + count]
+            self._buffered += count
+            start += count
+            if self._buffered == len(self._buffer):
+                self.flush()
+
+    def flush(self):
+        self._file.write(self._buffer[:self._buffered].tobytes())
+        self._file.flush()
+        self._buffered = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class ArchiveReader:
+    """
+    Reads an archive back as a stream of column chunks.
+    """
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param chunk_size: Number of records read at a time.
+        """
+        self.path = path
+        self.chunk_size = chunk_size
+        with open(path, "rb") as archive_file:
+            self.grid_rows, self.grid_columns = _read_header(archive_file)
+        self.num_actions = (os.path.getsize(path) - HEADER.size) // RECORD.itemsize
+
+    def chunks(self):
+        """
+        Yield the archive as dicts mapping each column name to a contiguous array. Every game is contained in a single
+        chunk: the records of a game that runs past the end of a chunk are held back and start the next one.
+        """
+        with open(self.path, "rb") as archive_file:
+            archive_file.seek(HEADER.size)
+            carried = None
+            while True:
+                records = np.fromfile(archive_file, dtype=RECORD, count=self.chunk_size)
+                if carried is not None and len(carried):
+                    records = np.concatenate((carried, records))
+                if len(records) == 0:
+                    return
+                if len(records) < self.chunk_size + (len(carried) if carried is not None else 0):
+                    # End of the archive, so the last game is complete.
+                    yield self._columns(records)
+                    return
+                games = records["game"]
+                end = len(records) - int(np.argmax(games[::-1] != games[-1]))
+                if end == len(records):
+                    # The whole chunk is a single unfinished game.
+                    carried = records
+                    continue
+                carried = records[end:]
+                yield self._columns(records[:end])
+
+    @staticmethod
+    def _columns(records):
+        columns = {name: np.ascontiguousarray(records[name]) for name in RECORD.names}
+        columns["round"] = columns["void_row"]
+        columns["outcome"] = ((columns["results"] >> (2 * columns["seat"])) & 3).astype(np.int8) - 1
+        return columns
+
+
+class ArchiveStats:
+    """
+    Aggregates column chunks from ArchiveReader.chunks(). Each chunk must hold whole games, and a game must not be
+    split across chunks.
+
+    mark_counts[row, column] counts the marks placed on each cell. survivors[v] counts the players who were still
+    taking turns once the void had taken v rows. dropped and carried are (wins, players) for the players who dropped
+    their planet at least once in a game and for those who never did. Every seat of every game is counted, including
+    seats that never took an action, which count as out from the start and as never having dropped their planet.
+    """
+
+    def __init__(self, grid_rows, grid_columns):
+        self.grid_rows = grid_rows
+        self.grid_columns = grid_columns
+        self.num_actions = 0
+        self.num_games = 0
+        self.action_counts = np.zeros(len(ACTION_TYPE_NAMES), dtype=np.int64)
+        self.mark_counts = np.zeros((grid_rows, grid_columns), dtype=np.int64)
+        self._last_void_rows = np.zeros(grid_rows + 1, dtype=np.int64)
+        self.dropped = (0, 0)
+        self.carried = (0, 0)
+
+    @classmethod
+    def from_archive(cls, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        reader = ArchiveReader(path, chunk_size=chunk_size)
+        stats = cls(reader.grid_rows, reader.grid_columns)
+        for columns in reader.chunks():
+            stats.update(columns)
+        return stats
+
+    def update(self, columns):
+        game = columns["game"]
+        if len(game) == 0:
+            return
+        action_type = columns["action_type"]
+        void_row = columns["void_row"]
+        self.num_actions += len(game)
+        self.action_counts += np.bincount(action_type, minlength=len(ACTION_TYPE_NAMES))
+
+        marks = columns["cell"][action_type == PLACE_MARK]
+        self.mark_counts += np.bincount(marks, minlength=self.mark_counts.size).reshape(self.mark_counts.shape)
+
+        # Games are stored contiguously, so a game starts wherever the game number changes.
+        new_game = np.empty(len(game), dtype=bool)
+        new_game[0] = True
+        np.not_equal(game[1:], game[:-1], out=new_game[1:])
+        starts = np.flatnonzero(new_game)
+        self.num_games += len(starts)
+
+        # One entry per seat of every game, numbered from each game's first entry.
+        players = columns["players"][starts].astype(np.int64)
+        first_entry = np.cumsum(players) - players
+        num_entries = int(players.sum())
+        entry_game = np.repeat(np.arange(len(starts)), players)
+        entry_seat = np.arange(num_entries) - first_entry[entry_game]
+        action_entry = first_entry[np.cumsum(new_game) - 1] + columns["seat"]
+
+        # void_row never decreases during a game, so the maximum is the row at the seat's last action.
+        last_void_rows = np.zeros(num_entries, dtype=void_row.dtype)
+        np.maximum.at(last_void_rows, action_entry, void_row)
+        self._last_void_rows += np.bincount(last_void_rows, minlength=len(self._last_void_rows))
+
+        won = (columns["results"][starts][entry_game] >> (2 * entry_seat)) & 3 == 2
+        dropped = np.zeros(num_entries, dtype=bool)
+        dropped[action_entry[action_type == DROP_PLANET]] = True
+        self.dropped = (
+            self.dropped[0] + int(np.count_nonzero(won & dropped)),
+            self.dropped[1] + int(np.count_nonzero(dropped)),
+        )
+        self.carried = (
+            self.carried[0] + int(np.count_nonzero(won & ~dropped)),
+            self.carried[1] + int(num_entries - np.count_nonzero(dropped)),
+        )
+
+    @property
+    def mark_heatmap(self):
+        """
+        :return: Share of all placed marks that went to each cell, as a (rows, columns) array.
+        """
+        total = self.mark_counts.sum()
+        return self.mark_counts / total if total else np.zeros(self.mark_counts.shape)
+
+    @property
+    def survivors(self):
+        return np.cumsum(self._last_void_rows[::-1])[::-1]
+
+    @property
+    def survival_curve(self):
+        """
+        :return: For each current_void_row v, the share of players still taking turns once the void had taken v rows.
+        """
+        survivors = self.survivors
+        return survivors / survivors[0] if survivors[0] else np.zeros(len(survivors))
+
+    @staticmethod
+    def win_rate(wins_and_players):
+        wins, players = wins_and_players
+        return wins / players if players else 0.0
+
+
+def record_random_games(path, num_games, num_players=2, seed=None):
+    """
+    Play games between random players and append them to an archive. Each action is picked by first choosing
+    between the legal movement, planet and Semiosphere actions, placing a mark and erasing a mark, and then picking
+    the cell at random, so that the many mark actions don't drown out the rest.
+    """
+    env = SemiosphereEnv(num_players=num_players)
+    rng = random.Random(seed)
+    with HistoryWriter(path, env.grid_rows, env.grid_columns) as writer:
+        env.recorder = writer
+        env.reset(seed=seed)
+        for _ in range(num_games):
+            while not env.terminated:
+                legal = env.legal_actions()
+                first_mark, first_erase = np.searchsorted(legal, (env.mark_offset, env.erase_offset))
+                choices = list(legal[:first_mark])
+                if first_erase > first_mark:
+                    choices.append(legal[first_mark:first_erase])
+                if first_erase < len(legal):
+                    choices.append(legal[first_erase:])
+                choice = rng.choice(choices)
+                env.step(choice[rng.randrange(len(choice))] if isinstance(choice, np.ndarray) else choice)
+            env.reset()
+        env.recorder = None
+        return writer.games_written
+
+
+def summarize(path):
+    stats = ArchiveStats.from_archive(path)
+    print("{} games, {} actions".format(stats.num_games, stats.num_actions))
+    for name, count in zip(ACTION_TYPE_NAMES, stats.action_counts):
+        print("\t{:<20}{}".format(name, count))
+
+    print("\nMarks placed per cell, top row first:")
+    for row in range(stats.grid_rows - 1, -1, -1):
+        print("{:>3} ".format(row) + " ".join("{:>6}".format(count) for count in stats.mark_counts[row]))
+
+    print("\nPlayers still in play once the void has taken each row:")
+    for void_row, (survivors, share) in enumerate(zip(stats.survivors, stats.survival_curve)):
+        print("\t{:>3}: {:>10} ({:.1%})".format(void_row, survivors, share))
+
+    print("\nWin rate after dropping the planet: {:.1%} of {} players".format(
+        stats.win_rate(stats.dropped), stats.dropped[1]
+    ))
+    print("Win rate always carrying the planet: {:.1%} of {} players".format(
+        stats.win_rate(stats.carried), stats.carried[1]
+    ))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) in (4, 5) and sys.argv[1] == "record":
+        games = record_random_games(
+            sys.argv[2],
+            num_games=int(sys.argv[3]),
+            num_players=int(sys.argv[4]) if len(sys.argv) == 5 else 2,
+        )
+        print("Recorded {} games to {}".format(games, sys.argv[2]))
+    elif len(sys.argv) == 3 and sys.argv[1] == "summarize":
+        summarize(sys.argv[2])
+    else:
+        print(__doc__.strip().splitlines()[-1])
+        exit(1)
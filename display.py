@@ -0,0 +1,216 @@
+"""
+Front ends for the interactive game in game.py.
+
+AsciiDisplay prints the whole board and menu after every action, exactly as the game always has. TerminalDisplay
+takes over the terminal instead: it keeps the last frame it drew and, on every update, only sends cursor-addressed
+writes for the characters that changed, so an action costs tens of bytes instead of a few kilobytes.
+"""
+import shutil
+import sys
+import textwrap
+from collections import deque
+
+
+# Number of message lines kept on screen by TerminalDisplay.
+MESSAGE_LINES = 2
+MENU_COLUMNS = 3
+MENU_COLUMN_WIDTH = 26
+# A cursor jump costs about as many bytes as this, so closer changes are sent as one run.
+MAX_GAP = 8
+
+
+class AsciiDisplay:
+    """
+    Plain line-by-line output. Works anywhere, including when output isn't a terminal.
+    """
+    # Let the game print its own void and mark messages.
+    game_verbose = True
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self.bytes_written = 0
+
+    def _write(self, text):
+        self.bytes_written += len(text.encode())
+        self.out.write(text)
+
+    def show_grid(self, game):
+        self._write(game.grid.get_grid_as_ascii() + "\n")
+
+    def show_turn(self, player, menu):
+        """
+        :param menu: List of (label, cost) for the numbered menu choices.
+        """
+        self._write("{player_name}, it's your turn and you have {moves_left} action(s) remaining. "
+                    "What would you like to do?\n".format(player_name=player.name, moves_left=player.moves_left))
+        if player.has_planet():
+            self._write("You currently DO have your planet.\n")
+        else:
+            self._write("You currently DON'T have your planet.\n")
+        for number, (label, cost) in enumerate(menu, 1):
+            self._write("\t{}. {:<20}Cost: {} Move(s)\n".format(number, label, cost))
+
+    def message(self, text):
+        self._write(text + "\n")
+
+    def ask(self, prompt):
+        self._write(prompt)
+        self.out.flush()
+        return input()
+
+    def close(self):
+        pass
+
+
+class TerminalDisplay:
+    """
+    Full-screen display using ANSI escape sequences on the terminal's alternate screen.
+
+    The screen holds the board as drawn by Grid.get_grid_as_ascii, a status line with the current player's
+    moves_left, a compact menu, the last few messages and a prompt line. Every line is kept narrower than the
+    terminal, so that each one stays on a single screen line: messages are wrapped and anything else is cut short.
+    """
+    game_verbose = False
+
+    def __init__(self, out=None, width=None):
+        """
+        :param width: Width of the terminal in characters. Defaults to the width of the current terminal.
+        """
+        self.out = out or sys.stdout
+        self.width = width or shutil.get_terminal_size().columns
+        self.bytes_written = 0
+        self._frame = []
+        self._grid_lines = []
+        self._status = ""
+        self._menu_lines = []
+        self._messages = deque([""] * MESSAGE_LINES, maxlen=MESSAGE_LINES)
+        self._prompt = None
+        self._started = False
+
+    @staticmethod
+    def required_lines(num_of_rows):
+        # Board (four header lines, the rows and the column labels), status, menu, messages, the prompt and the
+        # line the cursor moves to when enter is pressed.
+        return num_of_rows + 5 + 1 + -(-9 // MENU_COLUMNS) + MESSAGE_LINES + 2
+
+    @staticmethod
+    def required_columns(num_of_columns):
+        # The wider of the board and the menu, plus the last column, which is never written to.
+        return max(4 + 5 * num_of_columns, MENU_COLUMNS * MENU_COLUMN_WIDTH) + 1
+
+    def _write(self, text):
+        self.bytes_written += len(text.encode())
+        self.out.write(text)
+
+    def show_grid(self, game):
+        self._grid_lines = game.grid.get_grid_as_ascii().splitlines()
+        self._redraw()
+
+    def show_turn(self, player, menu):
+        self._status = "{name}: {moves_left} action(s) left, {planet}".format(
+            name=player.name,
+            moves_left=player.moves_left,
+            planet="carrying your planet" if player.has_planet() else "without your planet",
+        )
+        entries = [
+            "{}. {} ({})".format(number, label, cost).ljust(MENU_COLUMN_WIDTH)
+            for number, (label, cost) in enumerate(menu, 1)
+        ]
+        self._menu_lines = [
+            "".join(entries[start:start + MENU_COLUMNS]).rstrip()
+            for start in range(0, len(entries), MENU_COLUMNS)
+        ]
+        self._redraw()
+
+    def message(self, text):
+        self._messages.extend(textwrap.wrap(text, self.width - 1) or [""])
+        self._redraw()
+
+    def ask(self, prompt):
+        self._redraw()
+        line_number = len(self._frame) + 1
+        if prompt == self._prompt:
+            # Only clear the previous answer.
+            self._write("\x1b[{};{}H\x1b[K".format(line_number, len(prompt) + 1))
+        else:
+            self._write("\x1b[{};1H\x1b[K{}".format(line_number, prompt))
+            self._prompt = prompt
+        self.out.flush()
+        return input()
+
+    def close(self):
+        """
+        Leave the alternate screen and print the last messages, so they stay visible after the game exits.
+        """
+        if self._started:
+            self._write("\x1b[?1049l")
+            for text in self._messages:
+                if text:
+                    self._write(text + "\n")
+            self.out.flush()
+            self._started = False
+
+    def _compose(self):
+        lines = list(self._grid_lines)
+        lines.append(self._status)
+        lines.extend(self._menu_lines)
+        lines.extend(self._messages)
+        return [line[:self.width - 1] for line in lines]
+
+    def _redraw(self):
+        if not self._started:
+            # Switch to the alternate screen and clear it.
+            self._write("\x1b[?1049h\x1b[H\x1b[2J")
+            self._frame = []
+            self._started = True
+        frame = self._compose()
+        updates = []
+        for line_number, line in enumerate(frame):
+            old_line = self._frame[line_number] if line_number < len(self._frame) else ""
+            if line != old_line:
+                updates.extend(self._diff_line(line_number, old_line, line))
+        for line_number in range(len(frame), len(self._frame)):
+            updates.append("\x1b[{};1H\x1b[K".format(line_number + 1))
+        self._frame = frame
+        if updates:
+            self._write("".join(updates))
+            self.out.flush()
+
+    @staticmethod
+    def _diff_line(line_number, old_line, line):
+        """
+        :return: Cursor-addressed writes turning old_line into line. Changes closer together than MAX_GAP are sent
+                 as a single run.
+        """
+        width = max(len(old_line), len(line))
+        old_line = old_line.ljust(width)
+        line = line.ljust(width)
+        updates = []
+        column = 0
+        while column < width:
+            if line[column] == old_line[column]:
+                column += 1
+                continue
+            start = column
+            end = column + 1
+            column += 1
+            while column < width and column - end < MAX_GAP:
+                if line[column] != old_line[column]:
+                    end = column + 1
+                column += 1
+            updates.append("\x1b[{};{}H{}".format(line_number + 1, start + 1, line[start:end]))
+            column = end
+        return updates
+
+
+def create_display(num_of_rows, num_of_columns, ascii_only=False):
+    """
+    Use the full-screen display when output is a terminal big enough to hold a board of the given size, and plain
+    output otherwise.
+    """
+    if not ascii_only and sys.stdout.isatty():
+        size = shutil.get_terminal_size()
+        if (size.lines >= TerminalDisplay.required_lines(num_of_rows)
+                and size.columns >= TerminalDisplay.required_columns(num_of_columns)):
+            return TerminalDisplay(width=size.columns)
+    return AsciiDisplay()
@@ -0,0 +1,486 @@
+"""
+Reinforcement learning environment wrapping models.Game.
+
+The environment follows the Gym reset/step convention without depending on Gym itself. Every action available from
+the interactive menu in game.py is mapped onto a fixed-size, flat action space:
+
+    0                           Move Forward
+    1                           Move Left
+    2                           Move Right
+    3                           Move Backwards
+    4                           Drop my Planet
+    5                           Enter Semiosphere
+    leave_offset + column       Leave Semiosphere onto the given column of the top row
+    mark_offset + cell index    Place a Mark on the cell at (row, column), cell index = row * columns + column
+    erase_offset + cell index   Erase the mark on the cell at (row, column)
+
+Observations are a single preallocated int16 array of shape (num_planes, rows, columns). It is written in place as the
+game changes and is never rebuilt, so callers that need to keep an observation around must copy it.
+
+Games can be archived for analysis by passing a recorder, such as analytics.HistoryWriter. The recorder's start_game()
+is called on every reset, record() after every action and end_game() once a game is over.
+"""
+import random
+
+import numpy as np
+
+from models import GameFactory, Mark, ACTION_COSTS
+
+
+MOVE_FORWARD = 0
+MOVE_LEFT = 1
+MOVE_RIGHT = 2
+MOVE_BACKWARDS = 3
+DROP_PLANET = 4
+ENTER_SEMIOSPHERE = 5
+NUM_FIXED_ACTIONS = 6
+
+# (row offset, column offset, cost) for each of the movement actions, indexed by action id.
+MOVES = (
+    (1, 0, ACTION_COSTS["move_forward"]),
+    (0, -1, ACTION_COSTS["move_left"]),
+    (0, 1, ACTION_COSTS["move_right"]),
+    (-1, 0, ACTION_COSTS["move_backwards"]),
+)
+# Costs checked every time the action mask is rebuilt, looked up once here.
+FORWARD_COST, LEFT_COST, RIGHT_COST, BACKWARDS_COST = (cost for _, _, cost in MOVES)
+DROP_COST = ACTION_COSTS["drop_planet"]
+ENTER_COST = ACTION_COSTS["enter_semiosphere"]
+MARK_COST = ACTION_COSTS["place_mark"]
+ERASE_COST = ACTION_COSTS["erase_mark"]
+
+
+class SemiosphereEnv:
+    """
+    Gym-style environment for self-play. Seats take their turns in order; each step is a single action by the
+    current seat, and the turn passes once that seat has spent all of its moves or has no legal action left.
+
+    Observation planes, all seat-absolute:
+        plane_occupancy     seat + 1 of the player standing in the cell, 0 if empty
+        plane_marks + seat  1 where that seat has a mark
+        plane_planets       seat + 1 of the owner of a dropped planet in the cell, 0 if none
+        plane_void          1 where the void has taken the cell
+        plane_moves_left    filled with the current seat's remaining moves
+    """
+
+    def __init__(self, num_players=2, grid_rows=11, grid_columns=8, recorder=None):
+        if not 2 <= num_players <= min(4, grid_columns):
+            raise ValueError("Semiosphere needs between 2 and 4 players, and at most one player per column.")
+        self.num_players = num_players
+        self.grid_rows = grid_rows
+        self.grid_columns = grid_columns
+        num_cells = grid_rows * grid_columns
+
+        self.leave_offset = NUM_FIXED_ACTIONS
+        self.mark_offset = self.leave_offset + grid_columns
+        self.erase_offset = self.mark_offset + num_cells
+        self.num_actions = self.erase_offset + num_cells
+
+        self.plane_occupancy = 0
+        self.plane_marks = 1
+        self.plane_planets = self.plane_marks + num_players
+        self.plane_void = self.plane_planets + 1
+        self.plane_moves_left = self.plane_void + 1
+        self.num_planes = self.plane_moves_left + 1
+
+        self.observation = np.zeros((self.num_planes, grid_rows, grid_columns), dtype=np.int16)
+        self.action_mask = np.zeros(self.num_actions, dtype=bool)
+        self.rewards = np.zeros(num_players, dtype=np.float32)
+        self.recorder = recorder
+        self.info = {"action_mask": self.action_mask, "current_player": 0}
+
+        # Views into the arrays above, so that updates never allocate.
+        self._marks = self.observation[self.plane_marks:self.plane_planets]
+        self._moves_left = self.observation[self.plane_moves_left]
+        self._leave_mask = self.action_mask[self.leave_offset:self.mark_offset]
+        self._mark_mask = self.action_mask[self.mark_offset:self.erase_offset].reshape(grid_rows, grid_columns)
+        self._erase_mask = self.action_mask[self.erase_offset:].reshape(grid_rows, grid_columns)
+        # _markable[r, c] is True when anyone could place a mark on the cell; _erasable[seat, r, c] is True when the
+        # cell holds a mark that seat is allowed to erase.
+        self._markable = np.zeros((grid_rows, grid_columns), dtype=bool)
+        self._erasable = np.zeros((num_players, grid_rows, grid_columns), dtype=bool)
+
+        self._rng = random.Random()
+        # Finished games are recycled by the factory on reset.
+        self._factory = GameFactory(grid_rows=grid_rows, grid_columns=grid_columns, pool_size=1)
+        self._player_names = ["Player {}".format(seat + 1) for seat in range(num_players)]
+        self.game = None
+        self.players = []
+        self.current_player = 0
+        self.terminated = False
+        self._seat_of = {}
+        self._turn_order = []
+        self._turn_index = 0
+        # True while the leave-semiosphere part of the action mask may hold set bits.
+        self._leaving = False
+
+    def reset(self, seed=None):
+        """
+        Start a new game. Players are placed on random, distinct columns of the bottom row.
+        :param seed: Optional seed for the placement of players.
+        :return: (observation, info)
+        """
+        if seed is not None:
+            self._rng.seed(seed)
+        if self.game is not None:
+            self._factory.release(self.game)
+        self.game = self._factory.new_game(player_names=self._player_names)
+        self.players = list(self.game.players)
+        self._seat_of = {player: seat for seat, player in enumerate(self.players)}
+        if self.recorder is not None:
+            self.recorder.start_game(self)
+        self._start_game()
+        return self.observation, self.info
+
+    def _start_game(self):
+        self.observation.fill(0)
+        self.rewards.fill(0)
+        self._markable.fill(True)
+        self._erasable.fill(False)
+        self._leave_mask.fill(False)
+        self._leaving = False
+        columns = self._rng.sample(range(self.grid_columns), self.num_players)
+        for seat, player in enumerate(self.players):
+            self.game.move_player_to_cell(player=player, row_id=0, column_id=columns[seat])
+            self.observation[self.plane_occupancy, 0, columns[seat]] = seat + 1
+            self._markable[0, columns[seat]] = False
+
+        self.terminated = False
+        self._turn_order = list(range(self.num_players))
+        self._turn_index = 0
+        self.current_player = 0
+        self.info["current_player"] = 0
+        self.players[0].planet_action_this_turn = False
+        self._advance_turn()
+
+    def step(self, action):
+        """
+        Apply an action for the current seat.
+        :param action: An index into the flat action space. Must be legal under the current action mask.
+        :return: (observation, reward, terminated, truncated, info). The reward is for the seat that acted, and is
+                 only non-zero when the action ends the game: 1 for a win, 0 for a tie and -1 for a loss.
+        """
+        if self.terminated or not 0 <= action < self.num_actions or not self.action_mask[action]:
+            raise ValueError("Action {} is not legal for the current player.".format(action))
+        seat = self.current_player
+        player = self.players[seat]
+        moves_before = player.moves_left
+        void_row = self.game.current_void_row
+
+        if action < NUM_FIXED_ACTIONS:
+            if action <= MOVE_BACKWARDS:
+                row_offset, column_offset, cost = MOVES[action]
+                cell = player.current_cell
+                player.moves_left -= cost
+                self._move(seat, player, cell.row + row_offset, cell.column + column_offset)
+            elif action == DROP_PLANET:
+                self._drop_planet(seat, player)
+            else:
+                self._enter_semiosphere(seat, player)
+        elif action < self.mark_offset:
+            player.moves_left -= ACTION_COSTS["leave_semiosphere"]
+            player.in_semiosphere = False
+            self._move(seat, player, self.grid_rows - 1, action - self.leave_offset)
+        elif action < self.erase_offset:
+            row, column = divmod(action - self.mark_offset, self.grid_columns)
+            self._place_mark(seat, player, row, column)
+        else:
+            row, column = divmod(action - self.erase_offset, self.grid_columns)
+            self._erase_mark(player, row, column)
+
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.record(self, seat, action, moves_before, player.moves_left, void_row)
+        if not self.terminated:
+            self._advance_turn()
+        if recorder is not None and self.terminated:
+            recorder.end_game(self)
+        reward = float(self.rewards[seat]) if self.terminated else 0.0
+        return self.observation, reward, self.terminated, False, self.info
+
+    def legal_actions(self):
+        """
+        :return: An array of the action ids that are legal for the current seat.
+        """
+        return np.flatnonzero(self.action_mask)
+
+    def snapshot(self):
+        """
+        Capture the current game state, so that it can be put back with restore() after trying some actions.
+        :return: An opaque snapshot, only valid for restoring this environment within the current game.
+        """
+        return (
+            self.observation.copy(),
+            self.action_mask.copy(),
+            self._markable.copy(),
+            self._erasable.copy(),
+            self.rewards.copy(),
+            self.current_player,
+            self.terminated,
+            self._turn_order,
+            self._turn_index,
+            self._leaving,
+            self.game.current_void_row,
+            [
+                (
+                    player.current_cell,
+                    player.moves_left,
+                    player.alive,
+                    player.planet_action_this_turn,
+                    player.in_semiosphere,
+                    player.planet.location,
+                    player.planet.current_cell,
+                    player.planet.is_voided,
+                )
+                for player in self.players
+            ],
+        )
+
+    def restore(self, snapshot):
+        """
+        Return to a state captured by snapshot() earlier in the same game. Only the cells whose observation planes
+        have changed since the snapshot are rebuilt.
+        """
+        (
+            observation, action_mask, markable, erasable, rewards, self.current_player, self.terminated,
+            self._turn_order, self._turn_index, self._leaving, self.game.current_void_row, players,
+        ) = snapshot
+        changed = (self.observation[:self.plane_moves_left] != observation[:self.plane_moves_left]).any(axis=0)
+        for row, column in zip(*changed.nonzero()):
+            self._restore_cell(observation, row, column)
+        self.observation[...] = observation
+        self.action_mask[...] = action_mask
+        self._markable[...] = markable
+        self._erasable[...] = erasable
+        self.rewards[...] = rewards
+        self.info["current_player"] = self.current_player
+
+        for player, state in zip(self.players, players):
+            (
+                player.current_cell, player.moves_left, player.alive, player.planet_action_this_turn,
+                player.in_semiosphere, player.planet.location, player.planet.current_cell, player.planet.is_voided,
+            ) = state
+
+    def _restore_cell(self, observation, row, column):
+        """
+        Rebuild a single cell from a saved observation. Player and planet attributes are restored separately.
+        """
+        cell = self.game.grid.cells[row][column]
+        if observation[self.plane_void, row, column]:
+            cell.mark_for_void()
+            return
+        occupant = observation[self.plane_occupancy, row, column]
+        if occupant:
+            cell.occupied_by = self.players[occupant - 1]
+            cell.state = "occupied"
+        else:
+            cell.occupied_by = None
+            cell.state = "empty"
+
+        if cell.mark is not None:
+            cell.remove_mark()
+        for seat in range(self.num_players):
+            if observation[self.plane_marks + seat, row, column]:
+                Mark(player=self.players[seat], cell=cell)
+
+        if cell.planet is not None:
+            cell.remove_planet()
+        planet_owner = observation[self.plane_planets, row, column]
+        if planet_owner:
+            player = self.players[planet_owner - 1]
+            cell.add_planet(planet=player.planet, player=player)
+
+    def _move(self, seat, player, row, column):
+        """
+        Move a player onto a cell already known to be valid for them, picking up their planet if it is there.
+        Equivalent to Game.move_player_to_cell, without the checks or the printing.
+        """
+        old_cell = player.current_cell
+        if old_cell is not None:
+            old_cell.occupied_by = None
+            old_cell.state = "empty"
+            self.observation[self.plane_occupancy, old_cell.row, old_cell.column] = 0
+            self._markable[old_cell.row, old_cell.column] = old_cell.mark is None
+
+        cell = self.game.grid.cells[row][column]
+        cell.occupied_by = player
+        cell.state = "occupied"
+        player.current_cell = cell
+        self.observation[self.plane_occupancy, row, column] = seat + 1
+        self._markable[row, column] = False
+        if cell.planet is not None:
+            cell.remove_planet()
+            player.moves_left = max(player.moves_left - ACTION_COSTS["pickup_planet_resulting_cost"], 0)
+            player.planet_action_this_turn = True
+            self.observation[self.plane_planets, row, column] = 0
+
+    def _drop_planet(self, seat, player):
+        cell = player.cell_behind(grid=self.game.grid)
+        cell.add_planet(planet=player.planet, player=player)
+        player.moves_left += ACTION_COSTS["planet_dropped_bonus"] - ACTION_COSTS["drop_planet"]
+        player.planet_action_this_turn = True
+        self.observation[self.plane_planets, cell.row, cell.column] = seat + 1
+        self._markable[cell.row, cell.column] = False
+
+    def _enter_semiosphere(self, seat, player):
+        cell = player.current_cell
+        cell.remove_player()
+        player.current_cell = None
+        player.in_semiosphere = True
+        self.observation[self.plane_occupancy, cell.row, cell.column] = 0
+        self._markable[cell.row, cell.column] = not cell.has_mark()
+        if player.has_planet():
+            self._finish(winners=[seat])
+        else:
+            player.moves_left -= ACTION_COSTS["enter_semiosphere"]
+
+    def _place_mark(self, seat, player, row, column):
+        Mark(player=player, cell=self.game.grid.cells[row][column])
+        player.moves_left -= ACTION_COSTS["place_mark"]
+        self._marks[seat, row, column] = 1
+        self._markable[row, column] = False
+        self._erasable[:, row, column] = True
+        self._erasable[seat, row, column] = False
+
+    def _erase_mark(self, player, row, column):
+        cell = self.game.grid.cells[row][column]
+        self._marks[self._seat_of[cell.mark.player], row, column] = 0
+        cell.mark.erase_mark()
+        player.moves_left -= ACTION_COSTS["erase_mark"]
+        self._markable[row, column] = cell.is_empty() and not cell.has_planet()
+        self._erasable[:, row, column] = False
+
+    def _advance_turn(self):
+        """
+        Pass the turn along until a seat with a legal action is found, moving the void at the end of each round.
+        A seat with moves left but nothing legal to spend them on forfeits them.
+        """
+        while True:
+            player = self.players[self.current_player]
+            if player.moves_left > 0:
+                if self._update_action_mask(player):
+                    return
+                player.moves_left = 0
+
+            self._turn_index += 1
+            if self._turn_index == len(self._turn_order):
+                self._end_round()
+                if self.terminated:
+                    return
+                self._turn_index = 0
+            self.current_player = self._turn_order[self._turn_index]
+            self.info["current_player"] = self.current_player
+            self.players[self.current_player].planet_action_this_turn = False
+
+    def _end_round(self):
+        void_row = self.game.current_void_row
+        self.game.move_void_forward()
+        self.observation[:, void_row, :] = 0
+        self.observation[self.plane_void, void_row, :] = 1
+        self._markable[void_row, :] = False
+        self._erasable[:, void_row, :] = False
+
+        last_standing = self._turn_order
+        self._turn_order = [seat for seat in last_standing if self.players[seat].alive]
+        if len(self._turn_order) == 1:
+            self._finish(winners=self._turn_order)
+        elif len(self._turn_order) == 0:
+            # Everyone left was taken by the void at once, so they tie.
+            self._finish(winners=[], tied=last_standing)
+        elif self.game.current_void_row == self.grid_rows:
+            # Only players in the Semiosphere survive the final row, and none of them brought their planet.
+            self._finish(winners=[], tied=self._turn_order)
+        else:
+            for seat in self._turn_order:
+                player = self.players[seat]
+                player.moves_left += ACTION_COSTS["initial_moves_per_turn"]
+                if not player.has_planet():
+                    player.moves_left += ACTION_COSTS["planet_dropped_bonus"]
+
+    def _finish(self, winners, tied=()):
+        self.terminated = True
+        self.rewards.fill(-1)
+        self.rewards[list(winners)] = 1
+        self.rewards[list(tied)] = 0
+        self.action_mask.fill(False)
+        self._moves_left.fill(0)
+
+    def _update_action_mask(self, player):
+        """
+        Rewrite the action mask for the given player, who must be the current player.
+        :return: True if the player has at least one legal action.
+        """
+        moves_left = player.moves_left
+        mask = self.action_mask
+        cell = player.current_cell
+        cells = self.game.grid.cells
+        top_row = self.grid_rows - 1
+
+        if cell is not None:
+            row = cell.row
+            column = cell.column
+            can_enter = self._can_enter
+            mask[MOVE_FORWARD] = (
+                row < top_row and moves_left >= FORWARD_COST and can_enter(player, cells[row + 1][column])
+            )
+            mask[MOVE_LEFT] = (
+                column > 0 and moves_left >= LEFT_COST and can_enter(player, cells[row][column - 1])
+            )
+            mask[MOVE_RIGHT] = (
+                column < self.grid_columns - 1
+                and moves_left >= RIGHT_COST
+                and can_enter(player, cells[row][column + 1])
+            )
+            mask[MOVE_BACKWARDS] = (
+                row > 0 and moves_left >= BACKWARDS_COST and can_enter(player, cells[row - 1][column])
+            )
+            mask[DROP_PLANET] = (
+                row > 0
+                and moves_left >= DROP_COST
+                and not player.planet_action_this_turn
+                and player.planet.location != "cell"
+                and self._can_drop_planet(player, cells[row - 1][column])
+            )
+            mask[ENTER_SEMIOSPHERE] = row == top_row and moves_left >= ENTER_COST
+            if self._leaving:
+                self._leave_mask.fill(False)
+                self._leaving = False
+        else:
+            mask[:NUM_FIXED_ACTIONS] = False
+            for column, top_cell in enumerate(cells[top_row]):
+                self._leave_mask[column] = self._can_enter(player, top_cell)
+            self._leaving = True
+
+        if moves_left >= MARK_COST:
+            self._mark_mask[...] = self._markable
+        else:
+            self._mark_mask.fill(False)
+        if moves_left >= ERASE_COST:
+            self._erase_mask[...] = self._erasable[self.current_player]
+        else:
+            self._erase_mask.fill(False)
+        self._moves_left.fill(moves_left)
+        # argmax is much cheaper than any() on arrays this small.
+        return mask[mask.argmax()]
+
+    @staticmethod
+    def _can_enter(player, cell):
+        """
+        Same rules as Cell.valid_for_player_to_enter, comparing objects by identity. Hot path for the action mask.
+        """
+        if cell.state != "empty":
+            # Occupied or voided.
+            return False
+        planet = cell.planet
+        if planet is not None and (planet.player is not player or player.planet_action_this_turn):
+            return False
+        mark = cell.mark
+        return mark is None or mark.player is player
+
+    @staticmethod
+    def _can_drop_planet(player, cell):
+        if cell.state != "empty" or cell.planet is not None:
+            # Occupied or voided, or there's already a planet there.
+            return False
+        mark = cell.mark
+        return mark is None or mark.player is player
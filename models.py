@@ -33,7 +33,6 @@ class Cell:
     }
 
     state = "empty"
-    modifiers = []
     occupied_by = None
     planet = None
     mark = None
@@ -41,6 +40,7 @@ class Cell:
     def __init__(self, row, column):
         self.row = row
         self.column = column
+        self.modifiers = []
 
     def __str__(self):
         return "Cell in row {}, column {} with state {} and modifiers {}".format(
@@ -50,6 +50,16 @@ class Cell:
             print(', '.join(self.modifiers))
         )
 
+    def reset(self):
+        """
+        Return the cell to the blank state it was created in.
+        """
+        self.state = "empty"
+        self.occupied_by = None
+        self.planet = None
+        self.mark = None
+        self.modifiers = []
+
     def mark_for_void(self):
         self.state = "voided"
 
@@ -81,7 +91,6 @@ class Cell:
     def add_mark(self, mark, player):
         if self.has_mark():
             raise BadMarkError(cell=self, player=player)
-        print("Adding mark to cell {}".format(self))
         self.modifiers.append("marked")
         self.mark = mark
 
@@ -125,10 +134,6 @@ class Cell:
                     player.moves_left -= 2
                 else:
                     player.moves_left = 0
-                print("{name} picked up their planet, losing {actions_required} actions. ".format(
-                    name=player.name,
-                    actions_required=ACTION_COSTS['pickup_planet_resulting_cost']
-                ))
             return True
         else:
             return False
@@ -172,6 +177,9 @@ class Planet:
 
     def __init__(self, player):
         self.player = player
+        self.reset()
+
+    def reset(self):
         self.location = "player"
         self.current_cell = None
         self.is_voided = False
@@ -224,6 +232,14 @@ class Grid:
             id=self.id,
         )
 
+    def reset(self):
+        """
+        Return every cell to its blank state, so that the grid can be reused for a new game.
+        """
+        for row in self.cells:
+            for cell in row:
+                cell.reset()
+
     def get_number_of_rows(self):
         return len(self.cells)
 
@@ -257,13 +273,15 @@ class Grid:
                 cell.occupied_by.alive = False
             if cell.has_mark():
                 cell.mark.player.moves_left += 1
-                print("The void has awarded {} with {} point for leaving a mark for the void to take.".format(
-                    cell.mark.player.name,
-                    ACTION_COSTS['mark_voided']
-                ))
+                self.game.announce(
+                    "The void has awarded {} with {} point for leaving a mark for the void to take.".format(
+                        cell.mark.player.name,
+                        ACTION_COSTS['mark_voided']
+                    )
+                )
             if cell.has_planet():
                 cell.planet.is_voided = True
-                print("{}'s planet has been lost to the void.".format(cell.planet.player.name))
+                self.game.announce("{}'s planet has been lost to the void.".format(cell.planet.player.name))
             cell.mark_for_void()
 
     def get_grid_as_ascii(self):
@@ -351,8 +369,15 @@ class Player:
 
     def __init__(self, name):
         self.id = uuid.uuid4()
-        self.name = name
         self.planet = Planet(player=self)
+        self.reset(name)
+
+    def reset(self, name):
+        """
+        Return the player to the state of a newly created player with the given name, keeping their id and planet.
+        """
+        self.name = name
+        self.planet.reset()
         self.points = 0
         self.moves_left = 3
         self.current_cell = None
@@ -414,19 +439,51 @@ class Player:
 
 class Game:
 
-    def __init__(self, grid_rows, grid_columns, players):
-        self.id = uuid.uuid4()
-        self.grid = Grid(game=self, num_of_rows=grid_rows, num_of_columns=grid_columns)
+    def __init__(self, grid_rows, grid_columns, players, verbose=True, grid=None):
+        """
+        :param verbose: When False, the game never prints to stdout. Used by non-interactive callers such as
+                        the reinforcement learning environment.
+        :param grid: A blank grid of the given size to use instead of building a new one. See GameFactory.
+        """
+        self._id = None
+        self.verbose = verbose
+        # Called with the text of in-game events (mark awards, lost planets, planet pickups) when set, instead of
+        # printing them.
+        self.on_message = None
+        if grid is None:
+            grid = Grid(game=self, num_of_rows=grid_rows, num_of_columns=grid_columns)
+        else:
+            grid.game = self
+        self.grid = grid
         self.current_void_row = 0
         # self.players = [Player(name="Frost"), Player(name="lolwut?")]
         self.players = players
-        print(self.grid.get_grid_as_ascii())
+        if self.verbose:
+            print(self.grid.get_grid_as_ascii())
+
+    @property
+    def id(self):
+        # Created on first use, since most games from a GameFactory never need one.
+        if self._id is None:
+            self._id = uuid.uuid4()
+        return self._id
+
+    def announce(self, text):
+        """
+        Report an in-game event to on_message, or print it if there is no on_message and the game is verbose.
+        """
+        if self.on_message is not None:
+            self.on_message(text)
+        elif self.verbose:
+            print(text)
 
     def move_void_forward(self):
-        print("Row #{} has been lost to the void...\n".format(self.current_void_row))
+        if self.verbose:
+            print("Row #{} has been lost to the void...\n".format(self.current_void_row))
         self.grid.mark_row_for_void(self.current_void_row)
         self.current_void_row += 1
-        print(self.grid.get_grid_as_ascii())
+        if self.verbose:
+            print(self.grid.get_grid_as_ascii())
 
     def num_of_rows(self):
         return self.grid.get_number_of_rows()
@@ -437,9 +494,15 @@ class Game:
     def move_player_to_cell(self, player, row_id, column_id):
         cell = self.grid.cells[row_id][column_id]
         old_cell = player.current_cell
+        had_planet = player.has_planet()
         if not cell.set_player(player):
             raise BadMoveError(player=player, cell=cell)
         else:
+            if player.has_planet() and not had_planet:
+                self.announce("{name} picked up their planet, losing {actions_required} actions. ".format(
+                    name=player.name,
+                    actions_required=ACTION_COSTS['pickup_planet_resulting_cost']
+                ))
             if old_cell is None:
                 # This is the first placement.
                 player.current_cell = cell
@@ -454,6 +517,65 @@ class Game:
         return players
 
 
+class GameFactory:
+    """
+    Creates games of a single size for callers that go through many of them, such as self-play or a server.
+    Blank grids are built up front, and finished games handed back with release() have their grid and players reset
+    and reused, so a new game only costs a few attribute writes. Games from the factory are never rendered on creation.
+    """
+
+    def __init__(self, grid_rows, grid_columns, pool_size=16):
+        """
+        :param pool_size: How many blank grids to build up front, and the most grids and players kept for reuse.
+        """
+        self.grid_rows = grid_rows
+        self.grid_columns = grid_columns
+        self.pool_size = pool_size
+        self._grids = [
+            Grid(game=None, num_of_rows=grid_rows, num_of_columns=grid_columns) for _ in range(pool_size)
+        ]
+        self._players = []
+
+    def new_game(self, player_names, verbose=False):
+        """
+        :param player_names: Names of the players, in turn order. Players are always newly reset, but may reuse the
+                             objects of players from released games.
+        """
+        players = []
+        for name in player_names:
+            if self._players:
+                player = self._players.pop()
+                player.reset(name)
+            else:
+                player = Player(name)
+            players.append(player)
+        grid = self._grids.pop() if self._grids else None
+        return Game(
+            grid_rows=self.grid_rows,
+            grid_columns=self.grid_columns,
+            players=players,
+            verbose=verbose,
+            grid=grid,
+        )
+
+    def release(self, game):
+        """
+        Hand a finished game back for reuse. Neither the game nor its players may be used afterwards, and a game can
+        only be released once.
+        """
+        if game.grid is None:
+            raise ValueError("Game {} has already been released.".format(game.id))
+        if len(self._grids) < self.pool_size:
+            game.grid.reset()
+            game.grid.game = None
+            self._grids.append(game.grid)
+        for player in game.players:
+            if len(self._players) < self.pool_size * 4:
+                self._players.append(player)
+        game.grid = None
+        game.players = []
+
+
 class CellError(Exception):
     def __init__(self, player, cell):
         self.player = player
@@ -0,0 +1,370 @@
+"""
+Deterministic game-tree search over SemiosphereEnv.
+
+Two-player games are searched with alpha-beta. Games with three or four players use paranoid search, where every
+opponent is assumed to play against the searching player, which turns the game back into a two-sided search that
+alpha-beta can prune.
+
+A player's turn is a sequence of actions that ends once their moves are spent, so search depth is counted in turns:
+the depth only drops when the turn passes to another player, and every action inside a turn is searched in full.
+Iterative deepening runs one turn deeper at a time until the time limit, ordering actions with the transposition
+table, killer actions and the history heuristic.
+
+Usage: python3 search.py <seconds per turn> [number of players]
+"""
+import sys
+import time
+
+from models import ACTION_COSTS
+from environment import SemiosphereEnv
+
+
+WIN_SCORE = 100000
+# Scores at least this far from zero are forced results, WIN_SCORE less the number of actions until the game ends.
+FORCED_RESULT = WIN_SCORE - 1000
+# Weights for the evaluation of a single player.
+ROW_WEIGHT = 100
+VOID_DANGER = 400
+PLANET_HELD = 300
+PLANET_DROPPED = 150
+MARK_FOR_VOID = 40
+MARK_BLOCKING = 60
+MOVES_LEFT = 20
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Searcher:
+    """
+    Chooses actions for the current player of a SemiosphereEnv. The environment is searched in place and put back
+    the way it was before search() returns.
+
+    After each call to search(), nodes, depth_reached and elapsed describe the work done.
+    """
+
+    def __init__(self, env, time_limit=1.0, max_depth=32):
+        self.env = env
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.depth_reached = 0
+        self.elapsed = 0.0
+        self._history = [0] * env.num_actions
+        self._killers = []
+        self._table = {}
+        self._root_player = 0
+        self._root_best = None
+        self._deadline = 0.0
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+    def search(self):
+        """
+        Search the current position. Any recorder on the environment is detached while searching, so that only the
+        actions actually played get recorded.
+        :return: (action, score) for the current player. The action is the first of the best turn found, and the
+                 score is from the current player's point of view.
+        """
+        env = self.env
+        root = env.snapshot()
+        self._root_player = env.current_player
+        self._table = {}
+        self._killers = []
+        self._history = [0] * env.num_actions
+        self.nodes = 0
+        self.depth_reached = 0
+        start = time.perf_counter()
+        self._deadline = start + self.time_limit
+
+        recorder, env.recorder = env.recorder, None
+        try:
+            best_score, best_action = self._search_one_action()
+            for depth in range(1, self.max_depth + 1):
+                self._root_best = None
+                try:
+                    score, action = self._search(depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+                except SearchTimeout:
+                    env.restore(root)
+                    if self._root_best is not None:
+                        # Root actions are searched best first, so an action finished in the interrupted iteration
+                        # is at least as well informed as the previous iteration's choice.
+                        best_score, best_action = self._root_best
+                    break
+                best_action, best_score = action, score
+                self.depth_reached = depth
+                if abs(score) >= FORCED_RESULT:
+                    # Forced result found; searching deeper won't change it.
+                    break
+        finally:
+            env.recorder = recorder
+        self.elapsed = time.perf_counter() - start
+        return best_action, best_score
+
+    def _search_one_action(self):
+        """
+        Score every candidate action by evaluating the position right after it, as a fallback for when not even
+        one turn can be searched in time.
+        :return: (score, action) for the best of them.
+        """
+        env = self.env
+        best_score = None
+        best_action = None
+        for action in self.candidate_actions():
+            snapshot = env.snapshot()
+            env.step(action)
+            if env.terminated:
+                score = int(env.rewards[self._root_player]) * WIN_SCORE
+            else:
+                score = self.evaluate()
+            env.restore(snapshot)
+            if best_score is None or score > best_score:
+                best_score, best_action = score, action
+        return best_score, best_action
+
+    def _search(self, depth, alpha, beta, ply):
+        """
+        Alpha-beta over single actions, maximizing when the root player is moving and minimizing otherwise.
+        :return: (score, best action) from the root player's point of view.
+        """
+        env = self.env
+        self.nodes += 1
+        if self.nodes & 255 == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        if env.terminated:
+            return int(env.rewards[self._root_player]) * (WIN_SCORE - ply), None
+        if depth == 0:
+            return self.evaluate(), None
+
+        key = self._key()
+        entry = self._table.get(key)
+        table_action = None
+        if entry is not None:
+            entry_depth, bound, entry_score, table_action = entry
+            entry_score = self._score_from_table(entry_score, ply)
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return entry_score, table_action
+                if bound == LOWER_BOUND and entry_score >= beta:
+                    return entry_score, table_action
+                if bound == UPPER_BOUND and entry_score <= alpha:
+                    return entry_score, table_action
+
+        mover = env.current_player
+        maximizing = mover == self._root_player
+        original_alpha, original_beta = alpha, beta
+        best_score = None
+        best_action = None
+        for action in self._ordered_actions(table_action, ply):
+            snapshot = env.snapshot()
+            env.step(action)
+            child_depth = depth if env.current_player == mover and not env.terminated else depth - 1
+            score = self._search(child_depth, alpha, beta, ply + 1)[0]
+            env.restore(snapshot)
+
+            if best_score is None or (score > best_score if maximizing else score < best_score):
+                best_score = score
+                best_action = action
+                if ply == 0:
+                    self._root_best = (score, action)
+            if maximizing:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                self._record_cutoff(action, depth, ply)
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= original_beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self._table[key] = (depth, bound, self._score_to_table(best_score, ply), best_action)
+        return best_score, best_action
+
+    @staticmethod
+    def _score_to_table(score, ply):
+        """
+        Forced results are stored as the distance from the stored position rather than from the root, since the same
+        position can be reached at different plies.
+        """
+        if score >= FORCED_RESULT:
+            return score + ply
+        if score <= -FORCED_RESULT:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_table(score, ply):
+        if score >= FORCED_RESULT:
+            return score - ply
+        if score <= -FORCED_RESULT:
+            return score + ply
+        return score
+
+    def _key(self):
+        env = self.env
+        return (
+            env.observation.tobytes(),
+            env.current_player,
+            tuple(
+                (
+                    player.moves_left, player.planet_action_this_turn, player.in_semiosphere, player.alive,
+                    player.has_planet(),
+                )
+                for player in env.players
+            ),
+        )
+
+    def _record_cutoff(self, action, depth, ply):
+        self._history[action] += depth * depth
+        while len(self._killers) <= ply:
+            self._killers.append([None, None])
+        killers = self._killers[ply]
+        if killers[0] != action:
+            killers[1] = killers[0]
+            killers[0] = action
+
+    def _ordered_actions(self, table_action, ply):
+        """
+        The candidate actions for the current player, best first: the transposition table action, then killers,
+        then by history score.
+        """
+        actions = self.candidate_actions()
+        history = self._history
+        actions.sort(key=lambda action: history[action], reverse=True)
+        killers = self._killers[ply] if ply < len(self._killers) else ()
+        for killer in reversed(killers):
+            if killer is not None and killer in actions:
+                actions.remove(killer)
+                actions.insert(0, killer)
+        if table_action is not None and table_action in actions:
+            actions.remove(table_action)
+            actions.insert(0, table_action)
+        return actions
+
+    def candidate_actions(self):
+        """
+        The legal actions worth searching. Every movement, planet and Semiosphere action is kept, but marks are only
+        placed where they block an opponent or will be taken by the void next, and only marks in the way of the
+        current player are erased.
+        """
+        env = self.env
+        mask = env.action_mask
+        columns = env.grid_columns
+        actions = [action for action in range(env.mark_offset) if mask[action]]
+        player = env.players[env.current_player]
+
+        mark_cells = set()
+        for other in env.players:
+            if other is player or not other.alive or other.current_cell is None:
+                continue
+            row, column = other.current_cell.row, other.current_cell.column
+            if row + 1 < env.grid_rows:
+                mark_cells.add((row + 1) * columns + column)
+        void_row = env.game.current_void_row
+        if void_row < env.grid_rows:
+            for column in range(columns):
+                if mask[env.mark_offset + void_row * columns + column]:
+                    mark_cells.add(void_row * columns + column)
+                    break
+        actions.extend(env.mark_offset + cell for cell in sorted(mark_cells) if mask[env.mark_offset + cell])
+
+        if player.current_cell is not None:
+            row, column = player.current_cell.row, player.current_cell.column
+            neighbours = ((row + 1, column), (row, column - 1), (row, column + 1))
+        else:
+            neighbours = ((env.grid_rows - 1, column) for column in range(columns))
+        for row, column in neighbours:
+            if 0 <= row < env.grid_rows and 0 <= column < columns:
+                action = env.erase_offset + row * columns + column
+                if mask[action]:
+                    actions.append(action)
+
+        if not actions:
+            # Nothing above is legal, so fall back to whatever is.
+            actions = [int(action) for action in env.legal_actions()]
+        return actions
+
+    def evaluate(self):
+        """
+        Heuristic score of the current position from the root player's point of view: their own score less the best
+        opponent's score.
+        """
+        scores = [self.evaluate_player(seat) for seat in range(self.env.num_players)]
+        root_score = scores.pop(self._root_player)
+        return root_score - max(scores)
+
+    def evaluate_player(self, seat):
+        """
+        Heuristic score for one player: distance to the top row, how close the void is, the state of their planet,
+        the marks that will pay out under Grid.mark_row_for_void next round, the marks blocking opponents, and any
+        moves left this turn.
+        """
+        env = self.env
+        player = env.players[seat]
+        if not player.alive:
+            return -WIN_SCORE // 2
+        void_row = env.game.current_void_row
+        top_row = env.grid_rows - 1
+
+        if player.in_semiosphere:
+            score = ROW_WEIGHT * (top_row + 1)
+        else:
+            row = player.current_cell.row
+            score = ROW_WEIGHT * row
+            # A player still in the next row to be voided dies at the end of the round.
+            score -= VOID_DANGER // (row - void_row + 1)
+
+        if player.has_planet():
+            score += PLANET_HELD
+        elif not player.planet.is_voided:
+            planet_row = player.planet.current_cell.row
+            score += PLANET_DROPPED * (planet_row - void_row) // (top_row - void_row + 1)
+
+        if void_row <= top_row:
+            marks = env.observation[env.plane_marks + seat]
+            score += MARK_FOR_VOID * ACTION_COSTS["mark_voided"] * int(marks[void_row].sum())
+            for other in env.players:
+                if other is player or not other.alive or other.current_cell is None:
+                    continue
+                row, column = other.current_cell.row, other.current_cell.column
+                if row < top_row and marks[row + 1, column]:
+                    score += MARK_BLOCKING
+
+        if seat == env.current_player:
+            score += MOVES_LEFT * player.moves_left
+        return score
+
+
+def main(time_limit, num_players):
+    env = SemiosphereEnv(num_players=num_players)
+    env.reset(seed=0)
+    searcher = Searcher(env, time_limit=time_limit)
+    turns = 0
+    while not env.terminated:
+        player = env.current_player
+        action, score = searcher.search()
+        print("Player {} turn {}: action {} score {} depth {} nodes {} ({:.0f} nodes/s)".format(
+            player + 1, turns, action, score, searcher.depth_reached, searcher.nodes, searcher.nodes_per_second
+        ))
+        env.step(action)
+        if env.current_player != player:
+            turns += 1
+    print("Final rewards: {}".format(list(env.rewards)))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print(__doc__.strip().splitlines()[-1])
+        exit(1)
+    main(time_limit=float(sys.argv[1]), num_players=int(sys.argv[2]) if len(sys.argv) == 3 else 2)
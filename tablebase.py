@@ -0,0 +1,508 @@
+"""
+Endgame tablebase for two-player games, built by retrograde analysis.
+
+Once the void has taken all but the last few rows, the whole remaining game fits in a small state space. A tablebase
+layer holds every position on the last `rows` rows of a board with a given number of columns: where each player is
+(a cell or the Semiosphere), every mark, both planets, whose turn it is, the mover's moves_left, the other player's
+moves for the round and whether the mover has already touched their planet this turn.
+
+Positions are numbered densely with a mixed-radix index, solved from the end of the game backwards, and written two
+bits per position to a file that is memory-mapped when looked up, so probing a position costs a single byte read.
+
+The state space grows very quickly with the board size: one row of three columns is about 1.5 million positions, two
+rows of three columns is hundreds of millions. Generate small boards only.
+
+Usage: python3 tablebase.py <rows> <columns> <output path>
+"""
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from collections import deque
+
+import numpy as np
+
+from models import ACTION_COSTS
+from environment import (
+    MOVE_FORWARD, MOVE_LEFT, MOVE_RIGHT, MOVE_BACKWARDS, DROP_PLANET, ENTER_SEMIOSPHERE, NUM_FIXED_ACTIONS, MOVES
+)
+
+
+# Stored values, always from seat 0's point of view.
+UNKNOWN = 0
+SEAT_ONE_WINS = 1
+DRAW = 2
+SEAT_ZERO_WINS = 3
+
+MAGIC = b"SMTB"
+VERSION = 2
+# Magic, version, columns, max_moves, number of layers and the fingerprint of ACTION_COSTS the file was solved with.
+HEADER = struct.Struct("<4sHHHHI")
+LAYER_OFFSET = struct.Struct("<Q")
+
+
+class EndgameRules:
+    """
+    The rules of SemiosphereEnv restated over compact positions, for a board of `rows` remaining rows.
+
+    A position is a tuple (marks, location_0, location_1, planet_0, planet_1, side, moves_left, pending_moves,
+    planet_action_this_turn). Cells are numbered row * columns + column, with row 0 the next row the void will take.
+    With n cells, a location of n means the Semiosphere, and a planet of n is held by its player and n + 1 is lost.
+    marks is a tuple holding 0 for an unmarked cell or seat + 1 of the mark's owner. pending_moves is seat 1's
+    budget for the round while seat 0 is moving, and 0 while seat 1 is moving.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        # Start of turn budget, plus a mark award for every column, plus the net gain from dropping a planet.
+        self.max_moves = (
+            ACTION_COSTS["initial_moves_per_turn"]
+            + ACTION_COSTS["planet_dropped_bonus"]
+            + columns * ACTION_COSTS["mark_voided"]
+            + ACTION_COSTS["planet_dropped_bonus"] - ACTION_COSTS["drop_planet"]
+        )
+        self.min_budget = ACTION_COSTS["initial_moves_per_turn"]
+        self._seat_zero_turns = self.max_moves * (self.max_moves - self.min_budget + 1)
+        self.num_turn_states = self._seat_zero_turns + self.max_moves
+
+    def layer_size(self, rows):
+        cells = rows * self.columns
+        return 3 ** cells * (cells + 1) ** 2 * (cells + 2) ** 2 * self.num_turn_states * 2
+
+    def encode(self, rows, position):
+        marks, location_0, location_1, planet_0, planet_1, side, moves_left, pending_moves, flag = position
+        cells = rows * self.columns
+        index = 0
+        for mark in marks:
+            index = index * 3 + mark
+        index = (index * (cells + 1) + location_0) * (cells + 1) + location_1
+        index = (index * (cells + 2) + planet_0) * (cells + 2) + planet_1
+        if side == 0:
+            turn = (moves_left - 1) * (self.max_moves - self.min_budget + 1) + pending_moves - self.min_budget
+        else:
+            turn = self._seat_zero_turns + moves_left - 1
+        return (index * self.num_turn_states + turn) * 2 + flag
+
+    def decode(self, rows, index):
+        cells = rows * self.columns
+        index, flag = divmod(index, 2)
+        index, turn = divmod(index, self.num_turn_states)
+        if turn < self._seat_zero_turns:
+            side = 0
+            moves_left, pending_moves = divmod(turn, self.max_moves - self.min_budget + 1)
+            moves_left += 1
+            pending_moves += self.min_budget
+        else:
+            side = 1
+            moves_left = turn - self._seat_zero_turns + 1
+            pending_moves = 0
+        index, planet_1 = divmod(index, cells + 2)
+        index, planet_0 = divmod(index, cells + 2)
+        index, location_1 = divmod(index, cells + 1)
+        index, location_0 = divmod(index, cells + 1)
+        marks = [0] * cells
+        for cell in range(cells - 1, -1, -1):
+            index, marks[cell] = divmod(index, 3)
+        return tuple(marks), location_0, location_1, planet_0, planet_1, side, moves_left, pending_moves, flag
+
+    def side_of(self, index):
+        """
+        The side to move in the position with the given index, without decoding the rest of it.
+        """
+        return 0 if (index // 2) % self.num_turn_states < self._seat_zero_turns else 1
+
+    def is_valid(self, rows, position):
+        marks, location_0, location_1, planet_0, planet_1, side, moves_left, pending_moves, flag = position
+        semiosphere = rows * self.columns
+        if location_0 == location_1 and location_0 != semiosphere:
+            return False
+        for seat, location, planet in ((0, location_0, planet_0), (1, location_1, planet_1)):
+            if location == semiosphere:
+                if planet == semiosphere:
+                    # Entering the Semiosphere with your planet ends the game.
+                    return False
+            elif marks[location] not in (0, seat + 1):
+                return False
+            if planet < semiosphere:
+                if planet in (location_0, location_1) or marks[planet] not in (0, seat + 1):
+                    return False
+        return not (planet_0 == planet_1 and planet_0 < semiosphere)
+
+    def children(self, rows, position, lookup):
+        """
+        Every legal action from a position, with where it leads.
+        :param lookup: Callable (rows, position) -> stored value, used for positions after the void has moved.
+        :return: A list of (local action, child position, value). Exactly one of child position and value is None.
+                 Local actions use the SemiosphereEnv layout on a board of `rows` rows, and None means the mover
+                 has no legal action and forfeits the rest of their turn.
+        """
+        marks, location_0, location_1, planet_0, planet_1, side, moves_left, pending_moves, flag = position
+        columns = self.columns
+        cells = rows * columns
+        location, other_location = (location_0, location_1) if side == 0 else (location_1, location_0)
+        planet, other_planet = (planet_0, planet_1) if side == 0 else (planet_1, planet_0)
+        own_mark = side + 1
+        other_mark = 2 - side
+
+        def can_enter(cell):
+            if cell == other_location or cell == other_planet:
+                return False
+            if cell == planet and flag:
+                return False
+            return marks[cell] == 0 or marks[cell] == own_mark
+
+        def after(new_marks, new_location, new_planet, new_moves_left, new_flag):
+            if side == 0:
+                child = (new_marks, new_location, location_1, new_planet, planet_1, 0, new_moves_left, pending_moves,
+                         new_flag)
+            else:
+                child = (new_marks, location_0, new_location, planet_0, new_planet, 1, new_moves_left, 0, new_flag)
+            if new_moves_left > 0:
+                return child, None
+            return self._end_turn(rows, child, lookup)
+
+        def enter_cell(cell, new_moves_left):
+            if cell == planet:
+                new_moves_left = max(new_moves_left - ACTION_COSTS["pickup_planet_resulting_cost"], 0)
+                return after(marks, cell, cells, new_moves_left, 1)
+            return after(marks, cell, planet, new_moves_left, flag)
+
+        results = []
+        if location < cells:
+            row, column = divmod(location, columns)
+            targets = (
+                (MOVE_FORWARD, row < rows - 1, location + columns),
+                (MOVE_LEFT, column > 0, location - 1),
+                (MOVE_RIGHT, column < columns - 1, location + 1),
+                (MOVE_BACKWARDS, row > 0, location - columns),
+            )
+            for action, on_board, cell in targets:
+                cost = MOVES[action][2]
+                if on_board and moves_left >= cost and can_enter(cell):
+                    results.append((action,) + enter_cell(cell, moves_left - cost))
+            behind = location - columns
+            if (
+                row > 0
+                and moves_left >= ACTION_COSTS["drop_planet"]
+                and not flag
+                and planet == cells
+                and behind != other_location
+                and behind != other_planet
+                and marks[behind] in (0, own_mark)
+            ):
+                new_moves_left = moves_left - ACTION_COSTS["drop_planet"] + ACTION_COSTS["planet_dropped_bonus"]
+                results.append((DROP_PLANET,) + after(marks, location, behind, new_moves_left, 1))
+            if row == rows - 1 and moves_left >= ACTION_COSTS["enter_semiosphere"]:
+                if planet == cells:
+                    results.append((ENTER_SEMIOSPHERE, None, SEAT_ZERO_WINS if side == 0 else SEAT_ONE_WINS))
+                else:
+                    new_moves_left = moves_left - ACTION_COSTS["enter_semiosphere"]
+                    results.append((ENTER_SEMIOSPHERE,) + after(marks, cells, planet, new_moves_left, flag))
+        else:
+            for column in range(columns):
+                cell = (rows - 1) * columns + column
+                if can_enter(cell):
+                    new_moves_left = moves_left - ACTION_COSTS["leave_semiosphere"]
+                    results.append((NUM_FIXED_ACTIONS + column,) + enter_cell(cell, new_moves_left))
+
+        mark_offset = NUM_FIXED_ACTIONS + columns
+        erase_offset = mark_offset + cells
+        for cell in range(cells):
+            if marks[cell] == 0:
+                if (
+                    moves_left >= ACTION_COSTS["place_mark"]
+                    and cell not in (location_0, location_1, planet_0, planet_1)
+                ):
+                    new_marks = marks[:cell] + (own_mark,) + marks[cell + 1:]
+                    new_moves_left = moves_left - ACTION_COSTS["place_mark"]
+                    results.append((mark_offset + cell,) + after(new_marks, location, planet, new_moves_left, flag))
+            elif marks[cell] == other_mark and moves_left >= ACTION_COSTS["erase_mark"]:
+                new_marks = marks[:cell] + (0,) + marks[cell + 1:]
+                new_moves_left = moves_left - ACTION_COSTS["erase_mark"]
+                results.append((erase_offset + cell,) + after(new_marks, location, planet, new_moves_left, flag))
+
+        if not results:
+            results.append((None,) + self._end_turn(rows, position, lookup))
+        return results
+
+    def _end_turn(self, rows, position, lookup):
+        """
+        :return: (child position, value) for the end of the mover's turn, exactly one of which is None.
+        """
+        marks, location_0, location_1, planet_0, planet_1, side, moves_left, pending_moves, flag = position
+        if side == 0:
+            return (marks, location_0, location_1, planet_0, planet_1, 1, pending_moves, 0, 0), None
+
+        # The round is over and the void takes the bottom row.
+        columns = self.columns
+        cells = rows * columns
+        dead_0 = location_0 < columns
+        dead_1 = location_1 < columns
+        if dead_0 and dead_1:
+            return None, DRAW
+        if dead_0:
+            return None, SEAT_ONE_WINS
+        if dead_1:
+            return None, SEAT_ZERO_WINS
+        if rows == 1:
+            # Both players are in the Semiosphere without their planets.
+            return None, DRAW
+
+        budgets = []
+        planets = []
+        for seat, planet in ((0, planet_0), (1, planet_1)):
+            budget = ACTION_COSTS["initial_moves_per_turn"]
+            budget += marks[:columns].count(seat + 1) * ACTION_COSTS["mark_voided"]
+            if planet != cells:
+                budget += ACTION_COSTS["planet_dropped_bonus"]
+            budgets.append(budget)
+            if planet < columns or planet == cells + 1:
+                planets.append(cells + 1 - columns)
+            else:
+                planets.append(planet - columns)
+        child = (
+            marks[columns:], location_0 - columns, location_1 - columns, planets[0], planets[1],
+            0, budgets[0], budgets[1], 0,
+        )
+        return None, lookup(rows - 1, child)
+
+
+class Tablebase:
+    """
+    Read-only access to a generated tablebase file. The file is memory-mapped, so opening it is cheap and lookups
+    only touch the pages they need.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as tablebase_file:
+            self._data = mmap.mmap(tablebase_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, columns, max_moves, num_layers, costs = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a version {} Semiosphere tablebase.".format(path, VERSION))
+        self.rules = EndgameRules(columns)
+        if costs != costs_fingerprint() or max_moves != self.rules.max_moves:
+            raise ValueError("{} was generated with different action costs; generate it again.".format(path))
+        self.num_layers = num_layers
+        self._offsets = [
+            LAYER_OFFSET.unpack_from(self._data, HEADER.size + layer * LAYER_OFFSET.size)[0]
+            for layer in range(num_layers)
+        ]
+
+    def lookup(self, rows, position):
+        """
+        :return: The stored value of a position on a board of `rows` remaining rows, from seat 0's point of view.
+        """
+        index = self.rules.encode(rows, position)
+        return (self._data[self._offsets[rows - 1] + (index >> 2)] >> ((index & 3) << 1)) & 3
+
+    def probe(self, env):
+        """
+        Value of the current SemiosphereEnv position for the player to move.
+        :return: 1 for a forced win, 0 for a draw and -1 for a forced loss, or None if the position isn't covered.
+        """
+        position = self.position_from_env(env)
+        if position is None:
+            return None
+        rows = env.grid_rows - env.game.current_void_row
+        return self._value_for_side(self.lookup(rows, position), env.current_player)
+
+    def best_action(self, env):
+        """
+        An optimal action for the player to move in a SemiosphereEnv, or None if the position isn't covered.
+        """
+        position = self.position_from_env(env)
+        if position is None:
+            return None
+        void_row = env.game.current_void_row
+        rows = env.grid_rows - void_row
+        cells = rows * self.rules.columns
+        mark_offset = NUM_FIXED_ACTIONS + self.rules.columns
+        best_action = None
+        best_value = None
+        for action, child, value in self.rules.children(rows, position, self.lookup):
+            if action is None:
+                return None
+            if child is not None:
+                value = self.lookup(rows, child)
+            value = self._value_for_side(value, env.current_player)
+            if best_value is None or value > best_value:
+                best_value = value
+                best_action = action
+        # Marks and erases are numbered from the bottom of the remaining rows; shift them onto the full board.
+        if best_action >= mark_offset + cells:
+            return env.erase_offset + void_row * self.rules.columns + best_action - mark_offset - cells
+        if best_action >= mark_offset:
+            return env.mark_offset + void_row * self.rules.columns + best_action - mark_offset
+        return best_action
+
+    def position_from_env(self, env):
+        """
+        Convert the current SemiosphereEnv position into a tablebase position.
+        :return: The position, or None if the game or the board is outside what this tablebase covers.
+        """
+        rules = self.rules
+        if env.terminated or env.num_players != 2 or env.grid_columns != rules.columns:
+            return None
+        void_row = env.game.current_void_row
+        rows = env.grid_rows - void_row
+        if not 1 <= rows <= self.num_layers:
+            return None
+        cells = rows * rules.columns
+        seat_0, seat_1 = env.players
+        side = env.current_player
+        moves_left = env.players[side].moves_left
+        if side == 0:
+            pending_moves = seat_1.moves_left
+            if not rules.min_budget <= pending_moves <= rules.max_moves:
+                return None
+        else:
+            pending_moves = 0
+            if seat_0.moves_left != 0:
+                return None
+        if not 1 <= moves_left <= rules.max_moves:
+            return None
+
+        marks = []
+        for row in env.game.grid.cells[void_row:]:
+            for cell in row:
+                marks.append(0 if cell.mark is None else env.players.index(cell.mark.player) + 1)
+        locations = []
+        planets = []
+        for player in env.players:
+            if player.in_semiosphere:
+                locations.append(cells)
+            else:
+                locations.append((player.current_cell.row - void_row) * rules.columns + player.current_cell.column)
+            if player.has_planet():
+                planets.append(cells)
+            elif player.planet.is_voided:
+                planets.append(cells + 1)
+            else:
+                cell = player.planet.current_cell
+                planets.append((cell.row - void_row) * rules.columns + cell.column)
+        flag = int(env.players[side].planet_action_this_turn)
+        return (tuple(marks), locations[0], locations[1], planets[0], planets[1], side, moves_left, pending_moves,
+                flag)
+
+    @staticmethod
+    def _value_for_side(value, side):
+        if value == UNKNOWN:
+            return None
+        value -= DRAW
+        return value if side == 0 else -value
+
+
+def costs_fingerprint():
+    """
+    :return: A CRC of every entry in ACTION_COSTS, since the solved values depend on all of them.
+    """
+    return zlib.crc32(repr(sorted(ACTION_COSTS.items())).encode())
+
+
+def generate(rows, columns, path):
+    """
+    Solve every layer from a single remaining row up to `rows` remaining rows, and write them to `path`.
+    """
+    rules = EndgameRules(columns)
+    layers = []
+
+    def lookup(layer_rows, position):
+        index = rules.encode(layer_rows, position)
+        return (layers[layer_rows - 1][index >> 2] >> ((index & 3) << 1)) & 3
+
+    for layer_rows in range(1, rows + 1):
+        values = _solve_layer(rules, layer_rows, lookup)
+        layers.append(_pack(values))
+
+    offset = HEADER.size + LAYER_OFFSET.size * rows
+    with open(path, "wb") as tablebase_file:
+        tablebase_file.write(HEADER.pack(MAGIC, VERSION, columns, rules.max_moves, rows, costs_fingerprint()))
+        for layer in layers:
+            tablebase_file.write(LAYER_OFFSET.pack(offset))
+            offset += len(layer)
+        for layer in layers:
+            tablebase_file.write(layer)
+
+
+def _solve_layer(rules, rows, lookup):
+    """
+    Retrograde analysis of one layer. Positions whose value is settled by the end of the game or by a lower layer are
+    solved first; each solved position then updates its predecessors, and a predecessor is solved as soon as it has a
+    winning action for its mover, or once all of its actions are solved.
+    :return: A bytearray holding the value of every position in the layer.
+    """
+    size = rules.layer_size(rows)
+    values = bytearray(size)
+    # Best value found so far for each position, from seat 0's point of view, and its number of unsolved children.
+    best = bytearray(size)
+    unsolved = array("i", bytes(4 * size))
+    edge_parents = array("i")
+    edge_children = array("i")
+    queue = deque()
+
+    for index in range(size):
+        position = rules.decode(rows, index)
+        if not rules.is_valid(rows, position):
+            continue
+        maximizing = position[5] == 0
+        winning = SEAT_ZERO_WINS if maximizing else SEAT_ONE_WINS
+        best_value = UNKNOWN
+        children = 0
+        for action, child, value in rules.children(rows, position, lookup):
+            if child is not None:
+                edge_parents.append(index)
+                edge_children.append(rules.encode(rows, child))
+                children += 1
+            elif best_value == UNKNOWN or (value > best_value) == maximizing:
+                best_value = value
+        best[index] = best_value
+        unsolved[index] = children
+        if best_value == winning or children == 0:
+            values[index] = best_value
+            queue.append(index)
+
+    # Group the parents of each position together, so they can be walked when it is solved.
+    parents = np.frombuffer(edge_parents, dtype=np.int32)
+    children = np.frombuffer(edge_children, dtype=np.int32)
+    order = np.argsort(children, kind="stable")
+    parents = parents[order].tolist()
+    starts = np.searchsorted(children[order], np.arange(size + 1)).tolist()
+
+    while queue:
+        index = queue.popleft()
+        value = values[index]
+        for edge in range(starts[index], starts[index + 1]):
+            parent = parents[edge]
+            if values[parent] != UNKNOWN:
+                continue
+            maximizing = rules.side_of(parent) == 0
+            winning = SEAT_ZERO_WINS if maximizing else SEAT_ONE_WINS
+            if value == winning:
+                values[parent] = value
+                queue.append(parent)
+                continue
+            if best[parent] == UNKNOWN or (value > best[parent]) == maximizing:
+                best[parent] = value
+            unsolved[parent] -= 1
+            if unsolved[parent] == 0:
+                values[parent] = best[parent]
+                queue.append(parent)
+    return values
+
+
+def _pack(values):
+    """
+    Pack one value per byte into four values per byte.
+    """
+    padded = np.zeros(-(-len(values) // 4) * 4, dtype=np.uint8)
+    padded[:len(values)] = np.frombuffer(values, dtype=np.uint8)
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] | (quads[:, 1] << 2) | (quads[:, 2] << 4) | (quads[:, 3] << 6)).astype(np.uint8).tobytes()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print(__doc__.strip().splitlines()[-1])
+        exit(1)
+    generate(rows=int(sys.argv[1]), columns=int(sys.argv[2]), path=sys.argv[3])